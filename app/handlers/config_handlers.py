@@ -1,27 +1,81 @@
-import uuid
+import asyncio
 import inspect
 import traceback
 from asyncio.log import logger
 
 from aiohttp import web
-from decimal import Decimal
+
+from app.models.base_model import RETRYABLE_ERRORS, IdempotencyKeyConflict
+from app.templates.constans import DEFAULT_REQUEST_TIMEOUT, IDEMPOTENCY_KEY_MAX_LENGTH
+
+
+def request_timeout(request) -> float:
+    """
+    Read the client's ``X-Request-Timeout`` header (seconds), capped at the server default.
+
+    Raises:
+    ValueError: If the header is not a positive number.
+    """
+    header = request.headers.get("X-Request-Timeout")
+    if header is None:
+        return DEFAULT_REQUEST_TIMEOUT
+    timeout = float(header)
+    if not timeout > 0:
+        raise ValueError("X-Request-Timeout must be a positive number of seconds")
+    return min(timeout, DEFAULT_REQUEST_TIMEOUT)
 
 
 async def create_data_handler(request, model, create_method):
     try:
+        deadline = asyncio.get_running_loop().time() + request_timeout(request)
         data = await request.json()
+        if not isinstance(data, dict):
+            raise ValueError("request body must be a JSON object")
 
         # Extract the required arguments dynamically based on the model
+        signature = inspect.signature(create_method)
         args = {
             key: data[key]
-            for key in inspect.signature(create_method).parameters
-            if key in data and key != "waste_category"
+            for key in signature.parameters
+            if key in data
+            and key not in ("waste_category", "idempotency_key", "deadline")
         }
 
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key:
+            if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+                raise ValueError(
+                    f"Idempotency-Key must not exceed {IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+                )
+            # Scope the key to the model so one key can be reused across endpoints
+            args["idempotency_key"] = f"{model.__name__}:{idempotency_key}"
+
+        # Bind first, so a body missing a required field is reported as a bad request
+        try:
+            bound = signature.bind(**args, deadline=deadline)
+        except TypeError as e:
+            raise ValueError(str(e))
+
         # Call the create_method with the extracted arguments
-        record_id = await create_method(**args)
+        record_id = await create_method(*bound.args, **bound.kwargs)
 
         return web.json_response({"record_id": record_id}, status=200)
+    except ValueError as e:
+        logger.error(f"Invalid request: {str(e)}")
+        return web.Response(text=f"Invalid request: {str(e)}", status=400)
+    except IdempotencyKeyConflict as e:
+        logger.error(str(e))
+        return web.Response(text=str(e), status=409)
+    except asyncio.TimeoutError:
+        logger.error("Request deadline exceeded")
+        return web.Response(text="Request deadline exceeded", status=504)
+    except RETRYABLE_ERRORS as e:
+        logger.error(f"Database temporarily unavailable: {str(e)}")
+        return web.Response(
+            text=f"Database temporarily unavailable: {str(e)}",
+            status=503,
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         logger.error(f"An unexpected error occurred: {str(e)}")
         traceback.print_exc()
@@ -41,9 +95,10 @@ async def get_data_handler(request, model, method_name):
 
         for record in records:
             formatted_record = {
+                # Keep the one-decimal output of the SQL ROUND for the float footprint
                 key: (
-                    str(value)
-                    if isinstance(value, (Decimal, uuid.UUID))
+                    f"{value:.1f}"
+                    if key == "carbon_footprint" and value is not None
                     else str(value)
                 )
                 for key, value in record.items()
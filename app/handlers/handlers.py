@@ -1,15 +1,21 @@
+import asyncio
 import traceback
 from asyncio.log import logger
 
 from aiohttp import web
 from aiohttp_swagger import swagger_path
 
-from app.handlers.config_handlers import get_data_handler, create_data_handler
+from app.handlers.config_handlers import (
+    create_data_handler,
+    get_data_handler,
+    request_timeout,
+)
 from app.handlers.recommendation import (
     fetch_records,
     generate_recommendations,
     process_records,
 )
+from app.handlers.simulation import parse_scenario_request, simulate_scenarios
 from app.models.models import (
     BusinessTravelModel,
     EnergyUsageModel,
@@ -22,11 +28,17 @@ from app.models.models import (
 async def create_report_handler(request: web.Request) -> web.Response:
     logger.info("Create a new report")
     try:
-        report_uuid = (
-            await ReportModel.register_report()
+        deadline = asyncio.get_running_loop().time() + request_timeout(request)
+        report_uuid = await ReportModel.register_report(
+            deadline=deadline
         )  # Attempt to register a report
         # Convert UUID to string before returning in JSON response
         return web.json_response({"report_uuid": str(report_uuid)}, status=201)
+    except ValueError as e:
+        return web.Response(status=400, text=f"Invalid request: {str(e)}")
+    except asyncio.TimeoutError:
+        logger.error("Request deadline exceeded")
+        return web.Response(status=504, text="Request deadline exceeded")
     except Exception as e:
         logger.error(
             f"An unexpected error occurred: {str(e)}"
@@ -90,3 +102,21 @@ async def recommendation(request):
         logger.error(f"An unexpected error occurred: {str(e)}")
         traceback.print_exc()
         return web.Response(text=f"An error occurred: {str(e)}", status=500)
+
+
+# Stateless what-if simulation over the provided inputs, nothing is read from or written to the DB
+@swagger_path("./swagger/simulate-scenarios.yml")
+async def simulate_scenarios_handler(request):
+    logger.info("Simulate reduction scenarios")
+    try:
+        data = await request.json()
+        inputs, adjustments, top = parse_scenario_request(data)
+    except ValueError as e:
+        return web.Response(text=f"Invalid scenario request: {str(e)}", status=400)
+    try:
+        response_data = simulate_scenarios(inputs, adjustments, top)
+        return web.json_response({"data": response_data})
+    except Exception as e:
+        logger.error(f"An unexpected error occurred: {str(e)}")
+        traceback.print_exc()
+        return web.Response(text=f"An error occurred: {str(e)}", status=500)
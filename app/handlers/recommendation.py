@@ -1,6 +1,4 @@
-import uuid
 from asyncio.log import logger
-from decimal import Decimal
 
 from app.models.models import BusinessTravelModel, EnergyUsageModel, WasteSectorModel
 
@@ -25,13 +23,8 @@ def process_records(records):
     for record_name, record in records:
         if record:
             for item in record:
-                data = {
-                    key: (
-                        str(value) if isinstance(value, (Decimal, uuid.UUID)) else value
-                    )
-                    for key, value in item.items()
-                }
-                carbon_footprints[record_name] = float(data["carbon_footprint"])
+                # Records already carry the footprint as a float
+                carbon_footprints[record_name] = item.carbon_footprint
     return carbon_footprints
 
 
@@ -0,0 +1,248 @@
+import heapq
+import itertools
+import math
+from decimal import ROUND_HALF_UP, Decimal
+from math import prod
+
+from app.models.models import WasteCategory
+from app.templates.constans import (
+    DEFAULT_TOP_SCENARIOS,
+    ELECTRICITY_BILL_FACTOR,
+    FUEL_BILL_FACTOR,
+    MAX_SCENARIOS,
+    MONTHS_PER_YEAR,
+    NATURAL_GAS_BILL_FACTOR,
+    RECYCLABLE_WASTE_FACTOR,
+    TRAVEL_FUEL_FACTOR,
+)
+
+
+def as_numeric(value):
+    # Postgres evaluates the queries on exact numerics, so the inputs are taken at face value
+    return Decimal(str(value))
+
+
+def sql_round(value):
+    """ROUND(numeric, 1) as Postgres does it: exact decimals, halves away from zero."""
+    return float(value.quantize(Decimal("0.1"), rounding=ROUND_HALF_UP))
+
+
+# The formulas below mirror the carbon_footprint expressions of the get_* queries
+def energy_usage_footprint(
+    average_monthly_bill, average_natural_gas_bill, monthly_fuel_bill
+):
+    return sql_round(
+        as_numeric(average_monthly_bill)
+        * MONTHS_PER_YEAR
+        * as_numeric(ELECTRICITY_BILL_FACTOR)
+        + as_numeric(average_natural_gas_bill)
+        * MONTHS_PER_YEAR
+        * as_numeric(NATURAL_GAS_BILL_FACTOR)
+        + as_numeric(monthly_fuel_bill) * MONTHS_PER_YEAR * as_numeric(FUEL_BILL_FACTOR)
+    )
+
+
+def business_travel_footprint(kilometers_per_year, average_efficiency_per_100km):
+    return sql_round(
+        (as_numeric(kilometers_per_year) / as_numeric(average_efficiency_per_100km))
+        * as_numeric(TRAVEL_FUEL_FACTOR)
+    )
+
+
+def waste_sector_footprint(
+    waste_kg, recycled_or_composted_kg, waste_category=WasteCategory.RECYCLABLE.value
+):
+    if waste_category != WasteCategory.RECYCLABLE.value:
+        return 0.0
+    return sql_round(
+        (as_numeric(waste_kg) * MONTHS_PER_YEAR * as_numeric(RECYCLABLE_WASTE_FACTOR))
+        * ((100 - as_numeric(recycled_or_composted_kg)) / 100)
+    )
+
+
+# Adjustable inputs of every sector and the function computing its footprint
+SECTOR_INPUTS = {
+    "business_travel": ("kilometers_per_year", "average_efficiency_per_100km"),
+    "energy_usage": (
+        "average_monthly_bill",
+        "average_natural_gas_bill",
+        "monthly_fuel_bill",
+    ),
+    "waste_sector": ("waste_kg", "recycled_or_composted_kg"),
+}
+SECTOR_FOOTPRINTS = {
+    "business_travel": business_travel_footprint,
+    "energy_usage": energy_usage_footprint,
+    "waste_sector": waste_sector_footprint,
+}
+
+
+def adjust_value(field, value, percent):
+    if field == "recycled_or_composted_kg":
+        # This input is already a share of the waste, so adjustments are percentage points
+        return min(max(value + percent, 0.0), 100.0)
+    return value * (1 + percent / 100)
+
+
+def parse_number(value, name):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be a number")
+    if not math.isfinite(number):
+        raise ValueError(f"'{name}' must be a finite number")
+    return number
+
+
+def parse_input(field, value):
+    number = parse_number(value, field)
+    if field == "average_efficiency_per_100km":
+        if number <= 0:
+            raise ValueError(f"'{field}' must be greater than 0")
+    elif number < 0:
+        raise ValueError(f"'{field}' must not be negative")
+    if field == "recycled_or_composted_kg" and number > 100:
+        raise ValueError(f"'{field}' is a share of the waste and cannot exceed 100")
+    return number
+
+
+def parse_percent(field, value):
+    percent = parse_number(value, f"adjustments.{field}")
+    if field == "recycled_or_composted_kg":
+        # Percentage points, the result is clamped to 0-100 by adjust_value
+        return percent
+    if percent < -100 or (field == "average_efficiency_per_100km" and percent <= -100):
+        raise ValueError(f"adjustment {percent} for '{field}' is out of range")
+    return percent
+
+
+def parse_waste_category(value):
+    categories = [category.value for category in WasteCategory]
+    if value not in categories:
+        raise ValueError(f"'waste_category' must be one of: {', '.join(categories)}")
+    return value
+
+
+# Function to validate the request body and normalise it for simulate_scenarios
+def parse_scenario_request(data):
+    if not isinstance(data, dict):
+        raise ValueError("request body must be a JSON object")
+
+    inputs = {}
+    for sector, fields in SECTOR_INPUTS.items():
+        sector_data = data.get(sector)
+        if sector_data is None:
+            continue
+        if not isinstance(sector_data, dict):
+            raise ValueError(f"'{sector}' must be a JSON object")
+        missing = [field for field in fields if field not in sector_data]
+        if missing:
+            raise ValueError(f"missing inputs for {sector}: {', '.join(missing)}")
+        inputs[sector] = {
+            field: parse_input(field, sector_data[field]) for field in fields
+        }
+        if sector == "waste_sector":
+            inputs[sector]["waste_category"] = parse_waste_category(
+                sector_data.get("waste_category", WasteCategory.RECYCLABLE.value)
+            )
+    if not inputs:
+        raise ValueError(
+            f"at least one sector is required: {', '.join(SECTOR_INPUTS)}"
+        )
+
+    field_sectors = {
+        field: sector for sector in inputs for field in SECTOR_INPUTS[sector]
+    }
+    requested_adjustments = data.get("adjustments") or {}
+    if not isinstance(requested_adjustments, dict):
+        raise ValueError("'adjustments' must be a JSON object")
+    adjustments = {}
+    for field, percents in requested_adjustments.items():
+        if field not in field_sectors:
+            raise ValueError(f"no input provided for adjustment '{field}'")
+        if not isinstance(percents, list) or not percents:
+            raise ValueError(f"adjustments for '{field}' must be a non-empty list")
+        adjustments[field] = sorted(
+            {parse_percent(field, percent) for percent in percents}
+        )
+
+    scenario_count = prod(len(percents) for percents in adjustments.values())
+    if scenario_count > MAX_SCENARIOS:
+        raise ValueError(
+            f"{scenario_count} scenarios requested, the limit is {MAX_SCENARIOS}"
+        )
+
+    top = data.get("top", DEFAULT_TOP_SCENARIOS)
+    if isinstance(top, bool) or not isinstance(top, int) or top < 1:
+        raise ValueError("top must be a positive integer")
+
+    return inputs, adjustments, top
+
+
+# Function to evaluate every adjustment combination of a single sector
+def sector_surface(sector, values, adjustments):
+    fields = SECTOR_INPUTS[sector]
+    footprint = SECTOR_FOOTPRINTS[sector]
+    steps = [adjustments.get(field, [0.0]) for field in fields]
+    surface = []
+    for percents in itertools.product(*steps):
+        adjusted = dict(values)
+        for field, percent in zip(fields, percents):
+            adjusted[field] = adjust_value(field, values[field], percent)
+        surface.append((dict(zip(fields, percents)), footprint(**adjusted)))
+    return surface
+
+
+# Function to combine the sector surfaces into the full scenario grid
+def simulate_scenarios(inputs, adjustments, top=DEFAULT_TOP_SCENARIOS):
+    sectors = list(inputs)
+    # Sectors are independent, so each one is evaluated only over its own inputs
+    # and the full grid is the cartesian product of the per-sector results.
+    surfaces = [sector_surface(sector, inputs[sector], adjustments) for sector in sectors]
+    baseline = {
+        sector: SECTOR_FOOTPRINTS[sector](**inputs[sector]) for sector in sectors
+    }
+    baseline["total"] = round(sum(baseline.values()), 1)
+
+    scenarios = []
+    for combination in itertools.product(*surfaces):
+        scenario_adjustments = {}
+        carbon_footprint = {}
+        for sector, (percents, footprint) in zip(sectors, combination):
+            scenario_adjustments.update(percents)
+            carbon_footprint[sector] = footprint
+        carbon_footprint["total"] = round(sum(carbon_footprint.values()), 1)
+        scenarios.append(
+            {"adjustments": scenario_adjustments, "carbon_footprint": carbon_footprint}
+        )
+
+    # Prefer the lowest footprint, then the smallest overall change to reach it
+    best = heapq.nsmallest(
+        top,
+        scenarios,
+        key=lambda scenario: (
+            scenario["carbon_footprint"]["total"],
+            sum(abs(percent) for percent in scenario["adjustments"].values()),
+        ),
+    )
+    best_reductions = []
+    for scenario in best:
+        reduction = round(baseline["total"] - scenario["carbon_footprint"]["total"], 1)
+        best_reductions.append(
+            {
+                **scenario,
+                "reduction": reduction,
+                "reduction_percent": (
+                    round(reduction / baseline["total"] * 100, 1)
+                    if baseline["total"]
+                    else 0.0
+                ),
+            }
+        )
+
+    return {
+        "baseline": baseline,
+        "scenarios_evaluated": len(scenarios),
+        "surface": scenarios,
+        "best": best_reductions,
+    }
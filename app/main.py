@@ -10,6 +10,7 @@ from app.handlers.handlers import (
     get_waste_sector_handler,
     create_energy_usage_handler,
     get_business_travel_handler, recommendation,
+    simulate_scenarios_handler,
 )
 
 
@@ -37,6 +38,7 @@ async def init_app():
     app.router.add_get("/get-business-travel", get_business_travel_handler)
 
     app.router.add_get("/give-recommendation", recommendation)
+    app.router.add_post("/simulate-scenarios", simulate_scenarios_handler)
 
     # Setup Swagger documentation
     aiohttp_swagger.setup_swagger(
@@ -1,40 +1,162 @@
+import asyncio
+import hashlib
+import random
 from asyncio.log import logger
-from app.services.database import create_db_connection
+
+import asyncpg
+
+from app.models.records import BaseRecord
+from app.services.database import db_connection, remaining_time
+from app.templates.constans import (
+    IDEMPOTENCY_KEY_TTL_HOURS,
+    MAX_WRITE_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+
+# Transient failures after which the same write can safely be attempted again
+RETRYABLE_ERRORS = (
+    asyncpg.SerializationError,
+    asyncpg.DeadlockDetectedError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+    asyncpg.TooManyConnectionsError,
+    asyncpg.ConnectionDoesNotExistError,
+    OSError,
+)
+
+# A key is claimed before the write runs: a concurrent request with the same key blocks on
+# the unique index until the first one commits, then finds the key taken. Keys older than
+# the TTL are claimed again as if they were new.
+IDEMPOTENCY_CLAIM_QUERY = f"""
+    INSERT INTO idempotency_keys (idempotency_key, request_hash)
+    VALUES ($1, $2)
+    ON CONFLICT (idempotency_key) DO UPDATE
+    SET request_hash = EXCLUDED.request_hash,
+        record_id = NULL,
+        created_at = CURRENT_TIMESTAMP
+    WHERE idempotency_keys.created_at <= CURRENT_TIMESTAMP - interval '{IDEMPOTENCY_KEY_TTL_HOURS} hours'
+    RETURNING idempotency_key;
+"""
+IDEMPOTENCY_LOOKUP_QUERY = """
+    SELECT record_id, request_hash FROM idempotency_keys WHERE idempotency_key = $1;
+"""
+IDEMPOTENCY_STORE_QUERY = """
+    UPDATE idempotency_keys SET record_id = $2 WHERE idempotency_key = $1;
+"""
+
+
+class IdempotencyKeyConflict(Exception):
+    """Raised when an Idempotency-Key is reused with a different payload."""
+
+
+def request_hash(*args) -> str:
+    """Fingerprint of the bound query arguments, stored with each Idempotency-Key."""
+    return hashlib.sha256(repr(args).encode()).hexdigest()
 
 
 class BaseModel:
     @staticmethod
-    async def create_or_update_record(query: str, *args, record_fields: dict) -> int:
-        try:
-            conn = await create_db_connection()
-            record_id = await conn.fetchval(query, *args)
-            await conn.close()
+    async def create_or_update_record(
+        query: str,
+        *args,
+        record_fields: dict,
+        idempotency_key: str = None,
+        deadline: float = None,
+    ) -> int:
+        """
+        Run an upsert query, retrying transient failures with jittered backoff until ``deadline``.
+
+        When ``idempotency_key`` is given, a key that was already stored returns its record ID
+        without running the query again, or raises IdempotencyKeyConflict if it was stored
+        for different arguments.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await BaseModel._write_record(
+                    query, *args, idempotency_key=idempotency_key, deadline=deadline
+                )
+            except asyncio.TimeoutError as e:
+                # TimeoutError is an OSError, so it has to be handled before the retryable errors
+                logger.error("Request deadline exceeded while creating or updating record")
+                raise e
+            except RETRYABLE_ERRORS as e:
+                delay = random.uniform(
+                    0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                )
+                if attempt >= MAX_WRITE_ATTEMPTS or (
+                    deadline is not None
+                    and asyncio.get_running_loop().time() + delay >= deadline
+                ):
+                    logger.error(
+                        f"Failed to create or update record after {attempt} attempts: {str(e)}"
+                    )
+                    raise e
+                logger.warning(
+                    f"Transient failure on attempt {attempt}, retrying in {delay:.2f}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"Failed to create or update record: {str(e)}")
+                raise e
+
+    @staticmethod
+    async def _write_record(
+        query: str, *args, idempotency_key: str, deadline: float
+    ) -> int:
+        async with db_connection(deadline) as conn:
+            # No ``async with conn.transaction()``: its rollback would not be bounded by the
+            # deadline. On any failure db_connection terminates the connection instead,
+            # and the server aborts the uncommitted transaction.
+            transaction = conn.transaction()
+            await transaction.start()
+            if idempotency_key is not None:
+                fingerprint = request_hash(*args)
+                claimed = await conn.fetchval(
+                    IDEMPOTENCY_CLAIM_QUERY,
+                    idempotency_key,
+                    fingerprint,
+                    timeout=remaining_time(deadline),
+                )
+                if claimed is None:
+                    stored = await conn.fetchrow(
+                        IDEMPOTENCY_LOOKUP_QUERY,
+                        idempotency_key,
+                        timeout=remaining_time(deadline),
+                    )
+                    if stored is None or stored["request_hash"] != fingerprint:
+                        raise IdempotencyKeyConflict(
+                            f"Idempotency key {idempotency_key} was already used with a different payload"
+                        )
+                    logger.info(f"Idempotency key {idempotency_key} already used")
+                    await transaction.commit()
+                    return stored["record_id"]
+
+            record_id = await conn.fetchval(
+                query, *args, timeout=remaining_time(deadline)
+            )
+
+            if idempotency_key is not None:
+                await conn.execute(
+                    IDEMPOTENCY_STORE_QUERY,
+                    idempotency_key,
+                    record_id,
+                    timeout=remaining_time(deadline),
+                )
+            await transaction.commit()
             return record_id
-        except Exception as e:
-            logger.error(f"Failed to create or update record: {str(e)}")
-            raise e
-        finally:
-            if conn:
-                await conn.close()
 
     @staticmethod
-    async def get_records(query: str, *args, record_fields: dict) -> list:
+    async def get_records(query: str, *args, record_class: type[BaseRecord]) -> list:
         try:
-            conn = await create_db_connection()
-            rows = await conn.fetch(query, *args)
-            await conn.close()
-
-            if rows:
-                result = []
-                for row in rows:
-                    record = {field: row.get(field) for field in record_fields}
-                    result.append(record)
-                return result
-            else:
-                return []
+            async with db_connection() as conn:
+                rows = await conn.fetch(query, *args)
+
+            # Build the typed records straight from the asyncpg rows
+            from_row = record_class.from_row
+            return [from_row(row) for row in rows]
         except Exception as e:
             logger.error(f"Failed to get records: {str(e)}")
             raise e
-        finally:
-            if conn:
-                await conn.close()
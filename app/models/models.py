@@ -2,7 +2,20 @@ from enum import Enum
 from asyncio.log import logger
 
 from app.models.base_model import BaseModel
-from app.services.database import create_db_connection
+from app.models.records import (
+    BusinessTravelRecord,
+    EnergyUsageRecord,
+    WasteSectorRecord,
+)
+from app.services.database import db_connection, remaining_time
+from app.templates.constans import (
+    ELECTRICITY_BILL_FACTOR,
+    FUEL_BILL_FACTOR,
+    MONTHS_PER_YEAR,
+    NATURAL_GAS_BILL_FACTOR,
+    RECYCLABLE_WASTE_FACTOR,
+    TRAVEL_FUEL_FACTOR,
+)
 
 
 # It might be useful for the future of the project to encapsulate logic and make it more readable
@@ -14,10 +27,13 @@ class WasteCategory(Enum):
 
 class ReportModel:
     @staticmethod
-    async def register_report() -> str:
+    async def register_report(deadline: float = None) -> str:
         """
         Register a new report in the database and return the generated report UUID.
 
+        Args:
+        deadline (float): Optional event loop time by which the report must be registered
+
         Returns:
         str: The generated report UUID.
 
@@ -25,20 +41,19 @@ class ReportModel:
         Exception: If an error occurs during report registration.
         """
         try:
-            conn = await create_db_connection()
-            query = """
-            INSERT INTO reports DEFAULT VALUES
-            RETURNING report_uuid;  -- Return the generated 'report_uuid'
-            """
-            report_uuid = await conn.fetchval(
-                query
-            )  # Execute the query and get the report_uuid
+            # The connection is closed (or terminated on failure) when the block exits
+            async with db_connection(deadline) as conn:
+                query = """
+                INSERT INTO reports DEFAULT VALUES
+                RETURNING report_uuid;  -- Return the generated 'report_uuid'
+                """
+                report_uuid = await conn.fetchval(
+                    query, timeout=remaining_time(deadline)
+                )  # Execute the query and get the report_uuid
             return report_uuid
         except Exception as e:
             logger.error(f"Failed to register report: {str(e)}")
             raise e  # Re-raise the exception to be caught by the calling handler
-        finally:
-            await conn.close()  # Ensure the connection is closed
 
 
 class EnergyUsageModel(BaseModel):
@@ -50,6 +65,8 @@ class EnergyUsageModel(BaseModel):
         monthly_fuel_bill: float,
         city: str,
         company_name: str,
+        idempotency_key: str = None,
+        deadline: float = None,
     ) -> int:
         """
         Create or update energy usage records for in the database.
@@ -61,6 +78,8 @@ class EnergyUsageModel(BaseModel):
         monthly_fuel_bill (float): The monthly fuel bill.
         city (str): The city name
         company_name (str): Company name
+        idempotency_key (str): Optional key, a repeated key returns the stored record ID
+        deadline (float): Optional event loop time by which the write must complete
 
         Returns:
         int: The ID of the inserted or updated record.
@@ -113,6 +132,8 @@ RETURNING id;
             city,
             company_name,
             record_fields=record_fields,
+            idempotency_key=idempotency_key,
+            deadline=deadline,
         )
 
     @staticmethod
@@ -124,32 +145,25 @@ RETURNING id;
         company_name (str): The name of the company.
 
         Returns:
-        list: A list of dictionaries containing energy usage data for all reports related to the company, or an empty list if
+        list: A list of EnergyUsageRecord objects containing energy usage data for all reports related to the company, or an empty list if
         no data is found.
 
         Raises:
         Exception: If an error occurs during database operations.
         """
-        query = """
+        query = f"""
                     SELECT company_name,
                            city, 
                            created_at,
                            report_uuid,
-                           ROUND((average_monthly_bill * 12 * 0.0005) + 
-                                 (average_natural_gas_bill * 12 * 0.053) + 
-                                 (monthly_fuel_bill * 12 * 2.32), 1) AS carbon_footprint
+                           ROUND((average_monthly_bill * {MONTHS_PER_YEAR} * {ELECTRICITY_BILL_FACTOR}) + 
+                                 (average_natural_gas_bill * {MONTHS_PER_YEAR} * {NATURAL_GAS_BILL_FACTOR}) + 
+                                 (monthly_fuel_bill * {MONTHS_PER_YEAR} * {FUEL_BILL_FACTOR}), 1) AS carbon_footprint
                     FROM energy_usage 
                     WHERE company_name = $1;
                 """
-        record_fields = {
-            "company_name": "company_name",
-            "city": "city",
-            "created_at": "created_at",
-            "report_uuid": "report_uuid",
-            "carbon_footprint": "carbon_footprint",
-        }
         return await BaseModel.get_records(
-            query, company_name, record_fields=record_fields
+            query, company_name, record_class=EnergyUsageRecord
         )
 
 
@@ -162,6 +176,8 @@ class WasteSectorModel:
         city: str,
         company_name: str,
         waste_category: WasteCategory = WasteCategory.RECYCLABLE,  # Set a default value for waste_category
+        idempotency_key: str = None,
+        deadline: float = None,
     ) -> int:
         """
         Create or update waste sector in the database.
@@ -173,6 +189,8 @@ class WasteSectorModel:
         waste_category (enum): RECYCLABLE
         city (str): The name of the city
         company_name (str): The name of the company
+        idempotency_key (str): Optional key, a repeated key returns the stored record ID
+        deadline (float): Optional event loop time by which the write must complete
 
         Returns:
         int: The ID of the record created or updated in the database.
@@ -213,6 +231,8 @@ class WasteSectorModel:
             city,
             company_name,
             record_fields=record_fields,
+            idempotency_key=idempotency_key,
+            deadline=deadline,
         )
 
     @staticmethod
@@ -225,36 +245,28 @@ class WasteSectorModel:
             company_name (str): Name of the company
 
         Returns:
-            dict: A dictionary containing waste sector data including the calculated carbon footprint, or
-            None if no data is found.
+            list: A list of WasteSectorRecord objects including the calculated carbon footprint, or
+            an empty list if no data is found.
 
         Raises:
             Exception: If an error occurs during database operations.
 
         """
-        query = """
+        query = f"""
                     SELECT company_name, 
                            city, 
                            created_at,
                            report_uuid,
                            waste_category,
                            CASE 
-                               WHEN waste_category = 'RECYCLABLE' THEN ROUND((waste_kg * 12 * 0.57) * ((100 - recycled_or_composted_kg) / 100), 1)
+                               WHEN waste_category = 'RECYCLABLE' THEN ROUND((waste_kg * {MONTHS_PER_YEAR} * {RECYCLABLE_WASTE_FACTOR}) * ((100 - recycled_or_composted_kg) / 100), 1)
                                ELSE 0
                            END AS carbon_footprint
                     FROM waste_sector
                     WHERE company_name = $1;
                 """
-        record_fields = {
-            "company_name": "company_name",
-            "city": "city",
-            "created_at": "created_at",
-            "report_uuid": "report_uuid",
-            "carbon_footprint": "carbon_footprint",
-            "waste_category": "waste_category",
-        }
         return await BaseModel.get_records(
-            query, company_name, record_fields=record_fields
+            query, company_name, record_class=WasteSectorRecord
         )
 
 
@@ -266,6 +278,8 @@ class BusinessTravelModel:
         average_efficiency_per_100km: float,
         city: str,
         company_name: str,
+        idempotency_key: str = None,
+        deadline: float = None,
     ) -> int:
         """
         Create or update business travel data for
@@ -276,6 +290,8 @@ class BusinessTravelModel:
             average_efficiency_per_100km (float): The average efficiency of travel per 100 kilometers.
             city (str): The name of the city
             company_name (str): The name of the company
+            idempotency_key (str): Optional key, a repeated key returns the stored record ID
+            deadline (float): Optional event loop time by which the write must complete
 
         Returns:
             int: The ID of the record created or updated in the database.
@@ -312,6 +328,8 @@ class BusinessTravelModel:
             city,
             company_name,
             record_fields=record_fields,
+            idempotency_key=idempotency_key,
+            deadline=deadline,
         )
 
     @staticmethod
@@ -324,27 +342,20 @@ class BusinessTravelModel:
         company_name (str): The name of the company.
 
         Returns:
-        list: A list of dictionaries containing business travel data for the company, or an empty list if no data is found.
+        list: A list of BusinessTravelRecord objects containing business travel data for the company, or an empty list if no data is found.
 
         Raises:
         Exception: If an error occurs during database operations.
         """
-        query = """
+        query = f"""
                     SELECT company_name, 
                            city, 
                            created_at,
                            report_uuid,
-                           ROUND((kilometers_per_year / average_efficiency_per_100km) * 2.31, 1) AS carbon_footprint
+                           ROUND((kilometers_per_year / average_efficiency_per_100km) * {TRAVEL_FUEL_FACTOR}, 1) AS carbon_footprint
                     FROM business_travel 
                     WHERE company_name = $1;
                 """
-        record_fields = {
-            "company_name": "company_name",
-            "city": "city",
-            "created_at": "created_at",
-            "report_uuid": "report_uuid",
-            "carbon_footprint": "carbon_footprint",
-        }
         return await BaseModel.get_records(
-            query, company_name, record_fields=record_fields
+            query, company_name, record_class=BusinessTravelRecord
         )
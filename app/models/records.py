@@ -0,0 +1,62 @@
+import uuid
+from dataclasses import dataclass, fields
+from datetime import datetime
+from functools import cache
+
+
+@cache
+def field_names(record_class) -> tuple:
+    """Column names of a record class, in declaration order."""
+    return tuple(field.name for field in fields(record_class))
+
+
+@dataclass(frozen=True, slots=True)
+class BaseRecord:
+    """
+    Compact, typed representation of a single row returned by the ``get_*`` queries.
+
+    Slotted dataclasses cost a fixed number of pointers per row instead of a per-row dict.
+    ``carbon_footprint`` is kept as a float, which is what the recommendation code works with.
+    """
+
+    company_name: str | None
+    city: str | None
+    created_at: datetime | None
+    report_uuid: uuid.UUID
+    carbon_footprint: float | None
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build a record straight from an asyncpg ``Record`` (or any mapping with the same keys).
+
+        Args:
+        row (asyncpg.Record): A row returned by ``conn.fetch``.
+
+        Returns:
+        BaseRecord: The typed record.
+        """
+        values = {name: row[name] for name in field_names(cls)}
+        footprint = values["carbon_footprint"]
+        values["carbon_footprint"] = float(footprint) if footprint is not None else None
+        return cls(**values)
+
+    def items(self):
+        """Yield ``(field, value)`` pairs in column order, like ``dict.items``."""
+        for name in field_names(type(self)):
+            yield name, getattr(self, name)
+
+
+@dataclass(frozen=True, slots=True)
+class EnergyUsageRecord(BaseRecord):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class WasteSectorRecord(BaseRecord):
+    waste_category: str
+
+
+@dataclass(frozen=True, slots=True)
+class BusinessTravelRecord(BaseRecord):
+    pass
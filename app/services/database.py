@@ -1,10 +1,53 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import asyncpg
 
+from app.templates.constans import CONNECT_TIMEOUT
+
 
-async def create_db_connection():
+async def create_db_connection(timeout: float = CONNECT_TIMEOUT):
     return await asyncpg.connect(
         user="postgres",
         password="postgres",
         database="save_energy_project",
         host="",
+        timeout=timeout,
     )
+
+
+def remaining_time(deadline: float | None, default: float | None = None) -> float | None:
+    """
+    Return the seconds left until ``deadline`` (event loop time), or ``default`` without a deadline.
+
+    Raises:
+    asyncio.TimeoutError: If the deadline has already passed.
+    """
+    if deadline is None:
+        return default
+    remaining = deadline - asyncio.get_running_loop().time()
+    if remaining <= 0:
+        raise asyncio.TimeoutError("Request deadline exceeded")
+    return remaining
+
+
+@asynccontextmanager
+async def db_connection(deadline: float | None = None):
+    """
+    Open a connection for the duration of the block, bounded as a whole by ``deadline``.
+
+    Everything inside the block, including a transaction rollback and the final close,
+    must finish before the deadline. A connection that fails or runs out of time is
+    terminated instead of closed gracefully, so the caller never waits past the deadline.
+    """
+    conn = None
+    try:
+        async with asyncio.timeout_at(deadline):
+            conn = await create_db_connection(
+                timeout=remaining_time(deadline, CONNECT_TIMEOUT)
+            )
+            yield conn
+            await conn.close()
+    finally:
+        if conn is not None and not conn.is_closed():
+            conn.terminate()
@@ -3,3 +3,24 @@ recommendation_files = {
     "energy_usage": "./templates/recommendation_energy_usage.txt",
     "waste_sector": "./templates/recommendation_waste.txt",
 }
+
+# Emission factors (kg CO2) used by the get_* queries and the scenario simulation
+MONTHS_PER_YEAR = 12
+ELECTRICITY_BILL_FACTOR = 0.0005
+NATURAL_GAS_BILL_FACTOR = 0.053
+FUEL_BILL_FACTOR = 2.32
+TRAVEL_FUEL_FACTOR = 2.31
+RECYCLABLE_WASTE_FACTOR = 0.57
+
+# Upper bound on the number of scenarios evaluated by a single simulation request
+MAX_SCENARIOS = 10000
+DEFAULT_TOP_SCENARIOS = 5
+
+# Deadlines (seconds) and retries of the write path
+DEFAULT_REQUEST_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 60.0
+MAX_WRITE_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 1.0
+IDEMPOTENCY_KEY_TTL_HOURS = 24
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
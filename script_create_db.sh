@@ -77,6 +77,25 @@ CREATE TABLE IF NOT EXISTS waste_sector (
 );
 "
 
+# Record IDs returned for each Idempotency-Key, so a retried write costs a lookup instead of an upsert.
+# Keys are limited to IDEMPOTENCY_KEY_MAX_LENGTH (255) characters by the API
+CREATE_IDEMPOTENCY_KEYS_TABLE_SQL="
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    idempotency_key TEXT PRIMARY KEY,
+    request_hash TEXT NOT NULL,
+    record_id INTEGER,  -- NULL while the keyed write is in progress
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+"
+CREATE_IDEMPOTENCY_KEYS_INDEX_SQL="
+CREATE INDEX IF NOT EXISTS idempotency_keys_created_at_idx ON idempotency_keys (created_at);
+"
+# Keys expire after 24 hours (IDEMPOTENCY_KEY_TTL_HOURS); run this periodically, e.g. from cron,
+# to remove the expired rows
+CLEANUP_IDEMPOTENCY_KEYS_SQL="
+DELETE FROM idempotency_keys WHERE created_at < CURRENT_TIMESTAMP - interval '24 hours';
+"
+
 # Execute SQL commands to create tables in the new database
 echo "Creating tables in $DB_NAME"
 execute_sql "$DB_NAME" "$CREATE_REPORTS_TABLE_SQL"
@@ -84,6 +103,8 @@ execute_sql "$DB_NAME" "$CREATE_WASTE_TYPE"
 execute_sql "$DB_NAME" "$CREATE_WASTE_SECTOR_TABLE_SQL"
 execute_sql "$DB_NAME" "$CREATE_BUSINESS_TRAVEL_TABLE_SQL"
 execute_sql "$DB_NAME" "$CREATE_ENERGY_USAGE_TABLE_SQL"
+execute_sql "$DB_NAME" "$CREATE_IDEMPOTENCY_KEYS_TABLE_SQL"
+execute_sql "$DB_NAME" "$CREATE_IDEMPOTENCY_KEYS_INDEX_SQL"
 
 # Execute other table creation commands as before...
 echo "Database and tables created successfully."
@@ -0,0 +1,102 @@
+"""
+Memory and CPU benchmark: typed slotted records vs. the previous dict-per-row path.
+
+Run from the project root:
+    python -m tests.benchmark_records [rows]
+
+Plain dicts stand in for asyncpg ``Record`` objects, they support the same ``row[key]``
+and ``row.get(key)`` access used by both paths.
+"""
+import sys
+import timeit
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.handlers.recommendation import process_records
+from app.models.records import EnergyUsageRecord
+
+FIELDS = ("company_name", "city", "created_at", "report_uuid", "carbon_footprint")
+
+
+def make_rows(count):
+    created_at = datetime.now(timezone.utc)
+    return [
+        {
+            "company_name": "BMW",
+            "city": "Berlin",
+            "created_at": created_at,
+            "report_uuid": uuid.uuid4(),
+            "carbon_footprint": Decimal("4521.3"),
+        }
+        for _ in range(count)
+    ]
+
+
+# The previous implementation, kept here only as the baseline to compare against
+def dict_records(rows):
+    return [{field: row.get(field) for field in FIELDS} for row in rows]
+
+
+def dict_process_records(records):
+    carbon_footprints = {}
+    for record_name, record in records:
+        for item in record:
+            data = {
+                key: (str(value) if isinstance(value, (Decimal, uuid.UUID)) else value)
+                for key, value in item.items()
+            }
+            carbon_footprints[record_name] = float(data["carbon_footprint"])
+    return carbon_footprints
+
+
+def typed_records(rows):
+    from_row = EnergyUsageRecord.from_row
+    return [from_row(row) for row in rows]
+
+
+def measure_memory(build, rows):
+    tracemalloc.start()
+    records = build(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current
+
+
+def measure_cpu(build, process, rows, number=20):
+    return (
+        min(
+            timeit.repeat(
+                lambda: process([("energy_usage", build(rows))]),
+                number=number,
+                repeat=5,
+            )
+        )
+        / number
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rows = make_rows(count)
+
+    results = {
+        "dict": (
+            measure_memory(dict_records, rows),
+            measure_cpu(dict_records, dict_process_records, rows),
+        ),
+        "slots": (
+            measure_memory(typed_records, rows),
+            measure_cpu(typed_records, process_records, rows),
+        ),
+    }
+
+    print(f"{count} rows")
+    for name, (memory, cpu) in results.items():
+        print(f"{name:>6}: {memory / 1024:10.1f} KiB  {cpu * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
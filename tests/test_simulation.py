@@ -0,0 +1,220 @@
+import json
+import unittest
+
+from app.handlers.simulation import (
+    business_travel_footprint,
+    energy_usage_footprint,
+    parse_scenario_request,
+    simulate_scenarios,
+    waste_sector_footprint,
+)
+from app.templates.constans import MAX_SCENARIOS
+
+ENERGY_USAGE = {
+    "average_monthly_bill": 1800,
+    "average_natural_gas_bill": 580,
+    "monthly_fuel_bill": 75,
+}
+BUSINESS_TRAVEL = {"kilometers_per_year": 70000, "average_efficiency_per_100km": 8.5}
+WASTE_SECTOR = {"waste_kg": 5070, "recycled_or_composted_kg": 30}
+
+
+class FootprintFormulaTest(unittest.TestCase):
+    # Expected values are what the get_* queries return for the same inputs
+
+    def test_energy_usage(self):
+        # 1800 * 12 * 0.0005 + 580 * 12 * 0.053 + 75 * 12 * 2.32 = 2467.68
+        self.assertEqual(energy_usage_footprint(1800, 580, 75), 2467.7)
+
+    def test_business_travel(self):
+        # (70000 / 8.5) * 2.31 = 19023.529...
+        self.assertEqual(business_travel_footprint(70000, 8.5), 19023.5)
+
+    def test_waste_sector(self):
+        # (5070 * 12 * 0.57) * ((100 - 30) / 100) = 24275.16
+        self.assertEqual(waste_sector_footprint(5070, 30), 24275.2)
+
+    def test_waste_sector_non_recyclable(self):
+        self.assertEqual(waste_sector_footprint(5070, 30, "COMPOSTABLE"), 0.0)
+
+    def test_halves_round_away_from_zero_like_postgres(self):
+        # 25 * 12 * 0.0005 = 0.15 exactly, ROUND(0.15, 1) is 0.2 in Postgres
+        self.assertEqual(energy_usage_footprint(25, 0, 0), 0.2)
+
+
+class SimulateScenariosTest(unittest.TestCase):
+    def simulate(self, data):
+        return simulate_scenarios(*parse_scenario_request(data))
+
+    def test_baseline_without_adjustments(self):
+        result = self.simulate({"energy_usage": ENERGY_USAGE})
+        self.assertEqual(result["scenarios_evaluated"], 1)
+        self.assertEqual(
+            result["baseline"]["energy_usage"], energy_usage_footprint(1800, 580, 75)
+        )
+        self.assertEqual(result["best"][0]["reduction"], 0.0)
+
+    def test_surface_covers_every_combination(self):
+        result = self.simulate(
+            {
+                "energy_usage": ENERGY_USAGE,
+                "waste_sector": WASTE_SECTOR,
+                "adjustments": {
+                    "monthly_fuel_bill": [0, -10, -20],
+                    "waste_kg": [0, -50],
+                },
+            }
+        )
+        self.assertEqual(result["scenarios_evaluated"], 6)
+        self.assertEqual(len(result["surface"]), 6)
+
+    def test_best_scenarios_are_ordered(self):
+        result = self.simulate(
+            {
+                "business_travel": BUSINESS_TRAVEL,
+                "adjustments": {"kilometers_per_year": [0, -10, -20, -30]},
+                "top": 3,
+            }
+        )
+        totals = [scenario["carbon_footprint"]["total"] for scenario in result["best"]]
+        self.assertEqual(len(totals), 3)
+        self.assertEqual(totals, sorted(totals))
+        self.assertEqual(result["best"][0]["adjustments"]["kilometers_per_year"], -30)
+
+    def test_ties_prefer_the_smallest_change(self):
+        # Every non-recyclable scenario has the same footprint of 0
+        result = self.simulate(
+            {
+                "waste_sector": {**WASTE_SECTOR, "waste_category": "COMPOSTABLE"},
+                "adjustments": {"waste_kg": [-50, 0, -20]},
+                "top": 1,
+            }
+        )
+        self.assertEqual(result["best"][0]["adjustments"]["waste_kg"], 0)
+
+    def test_recycling_adjustments_are_percentage_points(self):
+        result = self.simulate(
+            {
+                "waste_sector": {**WASTE_SECTOR, "recycled_or_composted_kg": 0},
+                "adjustments": {"recycled_or_composted_kg": [50, 150]},
+            }
+        )
+        footprints = {
+            scenario["adjustments"]["recycled_or_composted_kg"]: scenario[
+                "carbon_footprint"
+            ]["waste_sector"]
+            for scenario in result["surface"]
+        }
+        self.assertEqual(footprints[50], waste_sector_footprint(5070, 50))
+        self.assertEqual(footprints[150], 0.0)
+
+    def test_response_is_valid_json(self):
+        result = self.simulate(
+            {
+                "energy_usage": ENERGY_USAGE,
+                "adjustments": {"monthly_fuel_bill": [0, -100]},
+            }
+        )
+        json.dumps(result, allow_nan=False)
+
+
+class ParseScenarioRequestTest(unittest.TestCase):
+    # Every ValueError is returned as a 400 by simulate_scenarios_handler
+
+    def assertInvalid(self, data):
+        with self.assertRaises(ValueError):
+            parse_scenario_request(data)
+
+    def test_body_must_be_an_object(self):
+        self.assertInvalid([ENERGY_USAGE])
+
+    def test_at_least_one_sector(self):
+        self.assertInvalid({})
+
+    def test_sector_must_be_an_object(self):
+        self.assertInvalid({"energy_usage": [1800, 580, 75]})
+
+    def test_missing_input(self):
+        self.assertInvalid({"business_travel": {"kilometers_per_year": 70000}})
+
+    def test_non_numeric_input(self):
+        self.assertInvalid({"energy_usage": {**ENERGY_USAGE, "monthly_fuel_bill": "a"}})
+
+    def test_non_finite_input(self):
+        for value in ("nan", "inf", "-inf"):
+            self.assertInvalid(
+                {"energy_usage": {**ENERGY_USAGE, "monthly_fuel_bill": value}}
+            )
+
+    def test_negative_input(self):
+        self.assertInvalid({"energy_usage": {**ENERGY_USAGE, "monthly_fuel_bill": -1}})
+
+    def test_zero_efficiency(self):
+        self.assertInvalid(
+            {"business_travel": {**BUSINESS_TRAVEL, "average_efficiency_per_100km": 0}}
+        )
+
+    def test_recycled_share_above_100(self):
+        self.assertInvalid(
+            {"waste_sector": {**WASTE_SECTOR, "recycled_or_composted_kg": 120}}
+        )
+
+    def test_unknown_waste_category(self):
+        for waste_category in ("recyclable", "RECYCLEABLE", ["RECYCLABLE"]):
+            self.assertInvalid(
+                {"waste_sector": {**WASTE_SECTOR, "waste_category": waste_category}}
+            )
+
+    def test_known_waste_category(self):
+        inputs, _, _ = parse_scenario_request(
+            {"waste_sector": {**WASTE_SECTOR, "waste_category": "COMPOSTABLE"}}
+        )
+        self.assertEqual(inputs["waste_sector"]["waste_category"], "COMPOSTABLE")
+
+    def test_adjustments_must_be_an_object(self):
+        for adjustments in ([1], "monthly_fuel_bill"):
+            self.assertInvalid(
+                {"energy_usage": ENERGY_USAGE, "adjustments": adjustments}
+            )
+
+    def test_adjustment_without_input(self):
+        self.assertInvalid(
+            {"energy_usage": ENERGY_USAGE, "adjustments": {"waste_kg": [-10]}}
+        )
+
+    def test_non_finite_adjustment(self):
+        self.assertInvalid(
+            {"energy_usage": ENERGY_USAGE, "adjustments": {"monthly_fuel_bill": ["nan"]}}
+        )
+
+    def test_adjustment_out_of_range(self):
+        self.assertInvalid(
+            {"energy_usage": ENERGY_USAGE, "adjustments": {"monthly_fuel_bill": [-110]}}
+        )
+        self.assertInvalid(
+            {
+                "business_travel": BUSINESS_TRAVEL,
+                "adjustments": {"average_efficiency_per_100km": [-100]},
+            }
+        )
+
+    def test_scenario_count_cap(self):
+        steps = list(range(101))
+        self.assertGreater(len(steps) ** 2, MAX_SCENARIOS)
+        self.assertInvalid(
+            {
+                "energy_usage": ENERGY_USAGE,
+                "adjustments": {
+                    "monthly_fuel_bill": [-step for step in steps],
+                    "average_monthly_bill": [-step for step in steps],
+                },
+            }
+        )
+
+    def test_top_must_be_a_positive_integer(self):
+        for top in (0, True, "3"):
+            self.assertInvalid({"energy_usage": ENERGY_USAGE, "top": top})
+
+
+if __name__ == "__main__":
+    unittest.main()
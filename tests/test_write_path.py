@@ -0,0 +1,270 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import asyncpg
+
+from app.handlers.config_handlers import create_data_handler
+from app.models.base_model import (
+    IDEMPOTENCY_CLAIM_QUERY,
+    IDEMPOTENCY_LOOKUP_QUERY,
+    IDEMPOTENCY_STORE_QUERY,
+    BaseModel,
+    IdempotencyKeyConflict,
+    request_hash,
+)
+from app.services.database import db_connection
+from app.templates.constans import MAX_WRITE_ATTEMPTS
+
+UPSERT_QUERY = "INSERT INTO business_travel ... RETURNING id;"
+
+
+class FakeTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def start(self):
+        self.conn.calls.append("begin")
+
+    async def commit(self):
+        self.conn.calls.append("commit")
+
+
+class FakeConnection:
+    """Stands in for an asyncpg connection, with scripted results per query."""
+
+    def __init__(self, record_id=42, claimed=True, stored=None, upsert_error=None):
+        self.record_id = record_id
+        self.claimed = claimed
+        self.stored = stored
+        self.upsert_error = upsert_error
+        self.calls = []
+        self.closed = False
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def fetchval(self, query, *args, timeout=None):
+        if query is IDEMPOTENCY_CLAIM_QUERY:
+            self.calls.append("claim")
+            return args[0] if self.claimed else None
+        self.calls.append("upsert")
+        if self.upsert_error is not None:
+            raise self.upsert_error
+        return self.record_id
+
+    async def fetchrow(self, query, *args, timeout=None):
+        assert query is IDEMPOTENCY_LOOKUP_QUERY
+        self.calls.append("lookup")
+        return self.stored
+
+    async def execute(self, query, *args, timeout=None):
+        assert query is IDEMPOTENCY_STORE_QUERY
+        self.calls.append(("store", args))
+
+    async def close(self):
+        self.calls.append("close")
+        self.closed = True
+
+    def terminate(self):
+        self.calls.append("terminate")
+        self.closed = True
+
+    def is_closed(self):
+        return self.closed
+
+
+def fake_connect(*results):
+    """Return a create_db_connection replacement yielding (or raising) ``results`` in order."""
+    results = list(results)
+    attempts = []
+
+    async def connect(timeout=None):
+        attempts.append(timeout)
+        result = results.pop(0) if len(results) > 1 else results[0]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    connect.attempts = attempts
+    return connect
+
+
+class WriteRecordTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # No backoff delay, so the retry tests run instantly
+        patcher = patch("app.models.base_model.random.uniform", return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def connect(self, *results):
+        connect = fake_connect(*results)
+        patcher = patch("app.services.database.create_db_connection", connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return connect
+
+    async def write(self, *args, **kwargs):
+        return await BaseModel.create_or_update_record(
+            UPSERT_QUERY, *args, record_fields={}, **kwargs
+        )
+
+    async def test_retries_connection_errors(self):
+        conn = FakeConnection()
+        connect = self.connect(OSError("refused"), OSError("refused"), conn)
+        self.assertEqual(await self.write("uuid", 100), 42)
+        self.assertEqual(len(connect.attempts), 3)
+
+    async def test_gives_up_after_max_attempts(self):
+        conn = FakeConnection(upsert_error=asyncpg.SerializationError("conflict"))
+        self.connect(conn)
+        with self.assertRaises(asyncpg.SerializationError):
+            await self.write("uuid", 100)
+        self.assertEqual(conn.calls.count("upsert"), MAX_WRITE_ATTEMPTS)
+
+    async def test_no_retry_past_the_deadline(self):
+        connect = self.connect(OSError("refused"), FakeConnection())
+        deadline = asyncio.get_running_loop().time() + 0.5
+        with patch("app.models.base_model.random.uniform", return_value=1.0):
+            with self.assertRaises(OSError):
+                await self.write("uuid", 100, deadline=deadline)
+        self.assertEqual(len(connect.attempts), 1)
+
+    async def test_expired_deadline_is_a_timeout(self):
+        connect = self.connect(FakeConnection())
+        deadline = asyncio.get_running_loop().time() - 1
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.write("uuid", 100, deadline=deadline)
+        self.assertEqual(connect.attempts, [])
+
+    async def test_new_key_is_claimed_and_stored(self):
+        conn = FakeConnection()
+        self.connect(conn)
+        self.assertEqual(await self.write("uuid", 100, idempotency_key="k"), 42)
+        self.assertEqual(
+            conn.calls,
+            ["begin", "claim", "upsert", ("store", ("k", 42)), "commit", "close"],
+        )
+
+    async def test_stored_key_returns_its_record_without_writing(self):
+        conn = FakeConnection(
+            claimed=False,
+            stored={"record_id": 7, "request_hash": request_hash("uuid", 100)},
+        )
+        self.connect(conn)
+        self.assertEqual(await self.write("uuid", 100, idempotency_key="k"), 7)
+        self.assertNotIn("upsert", conn.calls)
+
+    async def test_stored_key_with_a_different_payload_conflicts(self):
+        conn = FakeConnection(
+            claimed=False,
+            stored={"record_id": 7, "request_hash": request_hash("uuid", 100)},
+        )
+        self.connect(conn)
+        with self.assertRaises(IdempotencyKeyConflict):
+            await self.write("uuid", 200, idempotency_key="k")
+        self.assertNotIn("upsert", conn.calls)
+        self.assertNotIn("commit", conn.calls)
+
+
+class DbConnectionTest(unittest.IsolatedAsyncioTestCase):
+    async def test_closes_on_success(self):
+        conn = FakeConnection()
+        with patch("app.services.database.create_db_connection", fake_connect(conn)):
+            async with db_connection():
+                pass
+        self.assertEqual(conn.calls, ["close"])
+
+    async def test_terminates_on_failure(self):
+        conn = FakeConnection()
+        with patch("app.services.database.create_db_connection", fake_connect(conn)):
+            with self.assertRaises(RuntimeError):
+                async with db_connection():
+                    raise RuntimeError("query failed")
+        self.assertEqual(conn.calls, ["terminate"])
+
+    async def test_terminates_when_the_deadline_passes(self):
+        conn = FakeConnection()
+        deadline = asyncio.get_running_loop().time() + 0.05
+        with patch("app.services.database.create_db_connection", fake_connect(conn)):
+            with self.assertRaises(asyncio.TimeoutError):
+                async with db_connection(deadline):
+                    await asyncio.sleep(1)
+        self.assertEqual(conn.calls, ["terminate"])
+
+
+class FakeRequest:
+    def __init__(self, body, headers=None):
+        self.body = body
+        self.headers = headers or {}
+
+    async def json(self):
+        return self.body
+
+
+class FakeModel:
+    """Only the name is used, to scope the Idempotency-Key."""
+
+
+class CreateDataHandlerTest(unittest.IsolatedAsyncioTestCase):
+    BODY = {"report_uuid": "uuid", "kilometers_per_year": 100}
+
+    async def handle(self, body=BODY, headers=None, result=42):
+        calls = []
+
+        async def create_method(
+            report_uuid, kilometers_per_year, idempotency_key=None, deadline=None
+        ):
+            calls.append(idempotency_key)
+            if isinstance(result, BaseException):
+                raise result
+            return result
+
+        response = await create_data_handler(
+            FakeRequest(body, headers), FakeModel, create_method
+        )
+        return response, calls
+
+    async def test_success(self):
+        response, _ = await self.handle()
+        self.assertEqual(response.status, 200)
+
+    async def test_key_is_scoped_to_the_model(self):
+        _, calls = await self.handle(headers={"Idempotency-Key": "k"})
+        self.assertEqual(calls, ["FakeModel:k"])
+
+    async def test_timeout_is_504(self):
+        response, _ = await self.handle(result=asyncio.TimeoutError())
+        self.assertEqual(response.status, 504)
+
+    async def test_exhausted_retries_are_503(self):
+        response, _ = await self.handle(result=OSError("refused"))
+        self.assertEqual(response.status, 503)
+        self.assertIn("Retry-After", response.headers)
+
+    async def test_conflicting_key_is_409(self):
+        response, _ = await self.handle(result=IdempotencyKeyConflict("reused"))
+        self.assertEqual(response.status, 409)
+
+    async def test_missing_field_is_400(self):
+        response, calls = await self.handle(body={"report_uuid": "uuid"})
+        self.assertEqual(response.status, 400)
+        self.assertEqual(calls, [])
+
+    async def test_non_object_body_is_400(self):
+        response, calls = await self.handle(body=[self.BODY])
+        self.assertEqual(response.status, 400)
+        self.assertEqual(calls, [])
+
+    async def test_too_long_key_is_400(self):
+        response, calls = await self.handle(headers={"Idempotency-Key": "k" * 256})
+        self.assertEqual(response.status, 400)
+        self.assertEqual(calls, [])
+
+    async def test_invalid_timeout_header_is_400(self):
+        response, _ = await self.handle(headers={"X-Request-Timeout": "soon"})
+        self.assertEqual(response.status, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()